@@ -1,6 +1,7 @@
-import bpy, csv, os
+import bpy, csv, io, os, sys, argparse, queue, threading
 from mathutils import Vector
 import math
+from operator import itemgetter
 
 # SETUP
 OUT_CSV = bpy.path.abspath("//master_with_paths.csv") # relative to the blend file
@@ -12,12 +13,75 @@ SHAPES = ["Cone","Cube","Cylinder","Icosphere","Sphere","Torus"]
 CAMERAS_PER_CONFIG = 17
 # max # of brightest lights to record per frame
 MAX_ACTIVE_LIGHTS = 3
+# csv output chunk size (bytes) handed to the background writer
+WRITE_BUFFER_BYTES = 1 << 20
+
+# CSV LAYOUT
+# headers for the csv file
+header = ["image_relpath","image_exists","shape_name","material_folder","light_folder","batch_folder",
+    "frame","config_id","camera_png",
+    "render_engine","view_transform","look",
+    "camera_name",
+    "cam_pos_x","cam_pos_y","cam_pos_z",
+    "cam_forward_x","cam_forward_y","cam_forward_z",
+    "cam_up_x","cam_up_y","cam_up_z",
+    "cam_right_x","cam_right_y","cam_right_z",
+    "focal_length_mm",
+    "num_active_lights"]
+# columns per light
+_LIGHT_FIELDS = ("name","type","energy",
+                 "color_r","color_g","color_b",
+                 "pos_x","pos_y","pos_z",
+                 "dir_x","dir_y","dir_z",
+                 "dir_cam_x","dir_cam_y","dir_cam_z",
+                 "spot_cone_deg","spot_blend",
+                 "area_shape","area_size_x","area_size_y")
+header += [f"light{i}_{k}" for i in range(MAX_ACTIVE_LIGHTS) for k in _LIGHT_FIELDS]
+
+# fixed column indices .. rows are flat lists filled slot by slot
+COL = {name: i for i, name in enumerate(header)}
+IDX_RELPATH, IDX_EXISTS, IDX_SHAPE = COL["image_relpath"], COL["image_exists"], COL["shape_name"]
+IDX_MATERIAL, IDX_LIGHT_FOLDER, IDX_BATCH = COL["material_folder"], COL["light_folder"], COL["batch_folder"]
+IDX_FRAME, IDX_CONFIG, IDX_CAMERA_PNG = COL["frame"], COL["config_id"], COL["camera_png"]
+IDX_ENGINE = COL["render_engine"] # render_engine, view_transform, look
+IDX_CAMERA_NAME, IDX_FOCAL = COL["camera_name"], COL["focal_length_mm"]
+IDX_CAM_POS_X = COL["cam_pos_x"] # pos, forward, up, right xyz (12 cols)
+IDX_NUM_LIGHTS = COL["num_active_lights"]
+IDX_LIGHT0 = COL["light0_name"]
+# leading columns that differ per shape .. everything after is shared by a frame
+SHAPE_COLS = 3
+LIGHT_COLS = len(_LIGHT_FIELDS)
+# values slice-assigned into an unused light slot
+_EMPTY_LIGHT_SLOT = ("",) * LIGHT_COLS
 
 # map object names to light types
 LIGHTS_SINGLE = {"Area Light":"Area", "Point Light":"Point", "Spot Light":"Spot"}
 LIGHTS_TRI = ["TriLamp-Key","TriLamp-Fill","TriLamp-Back"]
 ALL_LIGHT_NAMES = list(LIGHTS_SINGLE.values()) + LIGHTS_TRI
 
+# cache light objects once .. bpy.data.objects lookups are O(n) per call
+LIGHT_OBJ_CACHE = {name: bpy.data.objects.get(name) for name in ALL_LIGHT_NAMES}
+# drop lights that are missing from the blend file
+LIGHT_OBJ_CACHE = {name: obj for name, obj in LIGHT_OBJ_CACHE.items() if obj}
+ALL_LIGHT_OBJS = [o for o in bpy.data.objects if o.type == "LIGHT"]
+# local axes (-Z forward, +Y up, +X right) .. built once, not per call
+AXIS_FORWARD = Vector((0,0,-1))
+AXIS_UP = Vector((0,1,0))
+AXIS_RIGHT = Vector((1,0,0))
+ZERO_VEC = Vector((0,0,0))
+# radians -> degrees as a plain multiply
+_RAD2DEG = 180.0 / math.pi
+
+def _rig(*names):
+    """Collect the cached objects for the given light names, skipping missing ones."""
+    return tuple(LIGHT_OBJ_CACHE[n] for n in names if n in LIGHT_OBJ_CACHE)
+
+# lights that should render for each setup .. HDRI setups use world lighting only
+SETUP_VISIBLE = {setup: _rig(name) for setup, name in LIGHTS_SINGLE.items()}
+SETUP_VISIBLE["Tri Light"] = _rig(*LIGHTS_TRI)
+SETUP_VISIBLE["HDRI (Sunlight)"] = ()
+SETUP_VISIBLE["HDRI (Overcast)"] = ()
+
 # HELPER FUNCTIONS
 def safe_float(x):
     """Safely cast to float, returning empty string if conversion fails."""
@@ -29,9 +93,150 @@ def safe_str(x):
     try: return str(x)
     except: return ""
 
-def obj_forward_world(obj):
-    """Compute the object's forward (-Z) direction in world space."""
-    return (obj.matrix_world.to_3x3() @ Vector((0,0,-1))).normalized()
+def obj_forward_world(mw_3x3):
+    """Compute an object's forward (-Z) direction in world space.
+
+    Args:
+        mw_3x3: The object's `matrix_world.to_3x3()`, read once by the caller.
+    """
+    return (mw_3x3 @ AXIS_FORWARD).normalized()
+
+def index_dataset(root):
+    """Walk the dataset once and collect the relative paths of all rendered images.
+
+    Only regular `.png` files reached without following symlinks are indexed, so
+    every entry is a path `os.path.exists` would also report. Anything else
+    (symlinks, case differing from the expected layout, non-file entries) is
+    simply not indexed and left to `image_exists` to check directly.
+
+    Args:
+        root: Dataset root to enumerate.
+
+    Returns:
+        Frozenset of `.png` paths relative to `root` (same layout as image_relpath).
+    """
+    existing = set()
+    def walk(dirpath, rel_dir):
+        try:
+            with os.scandir(dirpath) as it:
+                entries = list(it)
+        except OSError:
+            return
+        for e in entries:
+            rel = e.name if rel_dir is None else rel_dir + os.sep + e.name
+            if e.is_dir(follow_symlinks=False):
+                walk(e.path, rel)
+            elif e.name.endswith(".png") and e.is_file(follow_symlinks=False):
+                existing.add(rel)
+    walk(root, None)
+    return frozenset(existing)
+
+def image_exists(root, rel, existing):
+    """Check whether `rel` exists under `root`, using the `index_dataset` index first.
+
+    Index hits skip the stat() entirely; misses fall back to os.path.exists so the
+    result always matches a direct check.
+    """
+    return rel in existing or os.path.exists(os.path.join(root, rel))
+
+class BackgroundWriter:
+    """Text sink that hands full chunks to a writer thread (double buffered).
+
+    csv formatting keeps filling the next chunk while the previous one is being
+    written, so the export does not stall on disk writes. The file is fsynced on
+    close.
+
+    Args:
+        path: Output file path.
+        chunk_bytes: Approximate chunk size handed to the writer thread.
+        encoding: Text encoding of the output.
+    """
+    def __init__(self, path, chunk_bytes=WRITE_BUFFER_BYTES, encoding="utf-8"):
+        self._f = open(path, "wb", buffering=0)
+        self._chunk_bytes = chunk_bytes
+        self._encoding = encoding
+        self._parts, self._size = [], 0
+        # at most one chunk queued while another is being written
+        self._queue = queue.Queue(maxsize=1)
+        self._error = None
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        while True:
+            data = self._queue.get()
+            if data is None: return
+            if self._error: continue
+            try: self._write_all(data)
+            except OSError as e: self._error = e
+
+    def _write_all(self, data):
+        # raw FileIO.write may write fewer bytes than given .. loop until done
+        view = memoryview(data)
+        while view:
+            n = self._f.write(view)
+            if not n: raise OSError("short write to csv output")
+            view = view[n:]
+
+    def _submit(self):
+        if self._error: raise self._error
+        self._queue.put("".join(self._parts).encode(self._encoding))
+        self._parts, self._size = [], 0
+
+    def write(self, s):
+        self._parts.append(s)
+        self._size += len(s)
+        if self._size >= self._chunk_bytes: self._submit()
+        return len(s)
+
+    def close(self):
+        if self._f.closed: return
+        try:
+            try:
+                if self._parts: self._submit()
+            finally:
+                self._queue.put(None)
+                self._thread.join()
+            if self._error: raise self._error
+            os.fsync(self._f.fileno())
+        finally:
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+            return
+        # an exception is already in flight .. don't let a write error replace it
+        try: self.close()
+        except OSError: pass
+
+# scratch buffer for formatting partial csv lines
+_FMT_BUF = io.StringIO()
+_FMT_WRITER = csv.writer(_FMT_BUF, lineterminator="")
+
+def format_csv_fields(fields):
+    """Format `fields` as a csv fragment (no line terminator) with the default dialect."""
+    _FMT_BUF.seek(0); _FMT_BUF.truncate()
+    _FMT_WRITER.writerow(fields)
+    return _FMT_BUF.getvalue()
+
+def parse_args(argv, setup_names):
+    """Parse the script arguments Blender passes through after `--`.
+
+    Args:
+        argv: Full `sys.argv` of the Blender process.
+        setup_names: Valid lighting setup names.
+    """
+    argv = argv[argv.index("--")+1:] if "--" in argv else []
+    parser = argparse.ArgumentParser(prog="data_exporter.py",
+                                     description="Export per-image camera/light metadata to csv.")
+    parser.add_argument("--setup", action="append", choices=setup_names,
+                        help="only export this lighting setup (repeatable, default: all)")
+    parser.add_argument("--out", default=OUT_CSV, help="output csv path (default: %(default)s)")
+    return parser.parse_args(argv)
 
 def set_light_setup(setup_name):
     """Enable the desired light rig and disable all others.
@@ -39,190 +244,239 @@ def set_light_setup(setup_name):
     Args:
         setup_name: One of the names in `setups` (e.g., "Point Light", "Tri Light").
     """
-    # turn all known lights off first
-    for name in ALL_LIGHT_NAMES:
-        obj = bpy.data.objects.get(name)
-        if obj: obj.hide_render = True
-    # enable the single named lamp
-    if setup_name in LIGHTS_SINGLE:
-        obj = bpy.data.objects.get(LIGHTS_SINGLE[setup_name])
-        if obj: obj.hide_render = False
-    # enable the 3-point lighting setup
-    elif setup_name == "Tri Light":
-        for name in LIGHTS_TRI:
-            obj = bpy.data.objects.get(name)
-            if obj: obj.hide_render = False
-    # all lamps off .. world lighting only
-    elif setup_name.startswith("HDRI"):
-        pass
+    # turn all known lights off first, then enable the rig for this setup
+    for obj in LIGHT_OBJ_CACHE.values(): obj.hide_render = True
+    for obj in SETUP_VISIBLE.get(setup_name, ()): obj.hide_render = False
 
 def get_engine_and_batch(scene):
-    """Collect render engine settings and derive a batch folder name."""
+    """Collect render engine settings and derive a batch folder name.
+
+    Returns:
+        Tuple of (render_engine, view_transform, look, batch_folder).
+    """
     eng = safe_str(scene.render.engine).lower()
     eng_name = "Cycles" if "cycles" in eng else ("Eevee" if "eevee" in eng else "UnknownEngine")
 
     vt = safe_str(scene.view_settings.view_transform).lower()
     vt_name = "AGX" if "agx" in vt else ("Filmic" if "filmic" in vt else "UnknownView")
 
-    return {
-        "render_engine": safe_str(scene.render.engine),
-        "view_transform": safe_str(scene.view_settings.view_transform),
-        "look": safe_str(scene.view_settings.look),
-        # folder name used in the dataset layout
-        "batch_folder": f"Batch 1 - {eng_name} {vt_name}",
-    }
+    return (safe_str(scene.render.engine),
+            safe_str(scene.view_settings.view_transform),
+            safe_str(scene.view_settings.look),
+            # folder name used in the dataset layout
+            f"Batch 1 - {eng_name} {vt_name}")
+
+def get_camera_static(scene):
+    """Extract the active camera's name and lens (non-transform data).
 
-def get_camera(scene):
-    """Extract camera position, orientation vectors, and lens data."""
+    Returns:
+        Tuple of (camera_name, focal_length_mm).
+    """
     cam = scene.camera
-    if not cam: return {}
-    cam_pos = cam.matrix_world.translation
-    cam_rot = cam.matrix_world.to_3x3()
-    cam_forward = (cam_rot @ Vector((0,0,-1))).normalized()
-    cam_up = (cam_rot @ Vector((0,1,0))).normalized()
-    cam_right = (cam_rot @ Vector((1,0,0))).normalized()
-    return {
-        "camera_name": safe_str(cam.name),
-        "cam_pos_x": safe_float(cam_pos.x), "cam_pos_y": safe_float(cam_pos.y), "cam_pos_z": safe_float(cam_pos.z),
-        "cam_forward_x": safe_float(cam_forward.x), "cam_forward_y": safe_float(cam_forward.y), "cam_forward_z": safe_float(cam_forward.z),
-        "cam_up_x": safe_float(cam_up.x), "cam_up_y": safe_float(cam_up.y), "cam_up_z": safe_float(cam_up.z),
-        "cam_right_x": safe_float(cam_right.x), "cam_right_y": safe_float(cam_right.y), "cam_right_z": safe_float(cam_right.z),
-        "focal_length_mm": safe_float(cam.data.lens) if cam.data else "",
-    }
-
-def get_active_lights(scene, max_n=MAX_ACTIVE_LIGHTS):
-    """Return info for the brightest visible lights in the scene.
-
-    The list is sorted by energy and capped to `max_n`.
+    if not cam: return ("", "")
+    return (cam.name, float(cam.data.lens) if cam.data else "")
+
+def sample_frame(scene):
+    """Snapshot the frame-dependent state the export reads for the current frame.
+
+    Only the camera and lights are queried, through their evaluated copies. The
+    camera name & lens are read from the same (possibly marker-switched) active
+    camera as its transform.
+
+    Returns:
+        Tuple of ((camera_name, focal_length_mm), camera matrix_world or None,
+        light matrix_worlds, light energies), with the light lists aligned with
+        `ALL_LIGHT_OBJS`.
     """
+    depsgraph = bpy.context.evaluated_depsgraph_get()
     cam = scene.camera
-    cam_rot = cam.matrix_world.to_3x3() if cam else None
-    lights = []
+    cam_mw = cam.evaluated_get(depsgraph).matrix_world.copy() if cam else None
+    lights = [o.evaluated_get(depsgraph) for o in ALL_LIGHT_OBJS]
+    return (get_camera_static(scene), cam_mw,
+            [o.matrix_world.copy() for o in lights], [float(o.data.energy) for o in lights])
+
+def sample_frames(scene, frames):
+    """Evaluate each frame once and snapshot it with `sample_frame`.
+
+    The camera & light transforms do not depend on the lighting setup, so the
+    snapshots are shared by all setups instead of re-running frame_set per setup.
+    """
+    samples = {}
+    for frame in frames:
+        scene.frame_set(frame)
+        samples[frame] = sample_frame(scene)
+    return samples
+
+def get_camera_dynamic(cam_mw, row):
+    """Write camera position & orientation vectors for the current frame into `row`.
+
+    Fills the 12 pos, forward, up and right xyz slots starting at `IDX_CAM_POS_X`.
+
+    Args:
+        cam_mw: Camera matrix_world from `sample_frame`, or None without a camera.
+        row: Row template to fill.
+
+    Returns:
+        The camera's world rotation (3x3) for reuse this frame, or None without a camera.
+    """
+    if cam_mw is None:
+        row[IDX_CAM_POS_X:IDX_CAM_POS_X+12] = ("",) * 12
+        return None
+    cam_pos = cam_mw.translation
+    cam_rot = cam_mw.to_3x3()
+    cam_forward = obj_forward_world(cam_rot)
+    cam_up = (cam_rot @ AXIS_UP).normalized()
+    cam_right = (cam_rot @ AXIS_RIGHT).normalized()
+    row[IDX_CAM_POS_X:IDX_CAM_POS_X+12] = (
+            float(cam_pos.x), float(cam_pos.y), float(cam_pos.z),
+            float(cam_forward.x), float(cam_forward.y), float(cam_forward.z),
+            float(cam_up.x), float(cam_up.y), float(cam_up.z),
+            float(cam_right.x), float(cam_right.y), float(cam_right.z))
+    return cam_rot
+
+def get_active_lights(row, cam_rot, light_mws, light_energies, max_n=MAX_ACTIVE_LIGHTS):
+    """Write info for the brightest visible lights in the scene into `row`.
+
+    The list is sorted by energy and capped to `max_n`. Fills num_active_lights
+    and `max_n` light slots of `LIGHT_COLS` columns each.
+
+    Args:
+        row: Row template to fill.
+        cam_rot: Camera world rotation from `get_camera_dynamic`, or None.
+        light_mws: Light matrix_worlds from `sample_frame` (aligned with `ALL_LIGHT_OBJS`).
+        light_energies: Light energies from `sample_frame` (aligned with `ALL_LIGHT_OBJS`).
+        max_n: Number of light slots to emit.
+    """
+    # world -> camera rotation, inverted once for all lights .. matrix_world's 3x3
+    # includes object scale, so a transpose would be wrong for non-uniform scale
+    cam_rot_inv = cam_rot.inverted() if cam_rot else None
     # collect active lights (non-zero energy)
-    for obj in bpy.data.objects:
-        if obj.type != "LIGHT": continue
+    energies = []
+    for obj, mw, energy in zip(ALL_LIGHT_OBJS, light_mws, light_energies):
         if obj.hide_render: continue
-        energy = float(getattr(obj.data, "energy", 0.0))
         if energy <= 0.0: continue
-        lights.append(obj)
+        energies.append((energy, obj, mw))
     # sort by energy descending
-    lights.sort(key=lambda o: float(getattr(o.data, "energy", 0.0)), reverse=True)
-    lights = lights[:max_n]
+    energies.sort(key=itemgetter(0), reverse=True)
+    del energies[max_n:]
 
-    out = {"num_active_lights": len(lights)}
+    k = len(energies)
+    row[IDX_NUM_LIGHTS] = k
     for i in range(max_n):
-        p = f"light{i}_"
+        start = IDX_LIGHT0 + i * LIGHT_COLS
         # if no light for this slot, emit empty values
-        if i >= len(lights):
-            out.update({p+k:"" for k in ["name","type","energy","color_r","color_g","color_b",
-                                        "pos_x","pos_y","pos_z","dir_x","dir_y","dir_z",
-                                        "dir_cam_x","dir_cam_y","dir_cam_z",
-                                        "spot_cone_deg","spot_blend",
-                                        "area_shape","area_size_x","area_size_y"]})
+        if i >= k:
+            row[start:start+LIGHT_COLS] = _EMPTY_LIGHT_SLOT
             continue
 
-        obj = lights[i]
+        energy, obj, mw = energies[i]
         L = obj.data
         # world-space light position & direction
-        pos = obj.matrix_world.translation
-        dir_world = obj_forward_world(obj)
+        pos = mw.translation
+        dir_world = obj_forward_world(mw.to_3x3())
         # light direction in camera space
-        dir_cam = (cam_rot.inverted() @ dir_world).normalized() if cam_rot else Vector((0,0,0))
+        dir_cam = (cam_rot_inv @ dir_world).normalized() if cam_rot_inv else ZERO_VEC
         col = getattr(L, "color", (1,1,1))
 
-        out[p+"name"] = obj.name
-        out[p+"type"] = L.type
-        out[p+"energy"] = safe_float(getattr(L,"energy",0.0))
-        out[p+"color_r"] = safe_float(col[0]); out[p+"color_g"] = safe_float(col[1]); out[p+"color_b"] = safe_float(col[2])
-        out[p+"pos_x"] = safe_float(pos.x); out[p+"pos_y"] = safe_float(pos.y); out[p+"pos_z"] = safe_float(pos.z)
-        out[p+"dir_x"] = safe_float(dir_world.x); out[p+"dir_y"] = safe_float(dir_world.y); out[p+"dir_z"] = safe_float(dir_world.z)
-        out[p+"dir_cam_x"] = safe_float(dir_cam.x); out[p+"dir_cam_y"] = safe_float(dir_cam.y); out[p+"dir_cam_z"] = safe_float(dir_cam.z)
+        out = [obj.name, L.type, energy,
+                float(col[0]), float(col[1]), float(col[2]),
+                float(pos.x), float(pos.y), float(pos.z),
+                float(dir_world.x), float(dir_world.y), float(dir_world.z),
+                float(dir_cam.x), float(dir_cam.y), float(dir_cam.z)]
 
         # spotlight properties
         if L.type == "SPOT":
-            out[p+"spot_cone_deg"] = safe_float(math.degrees(L.spot_size))
-            out[p+"spot_blend"] = safe_float(L.spot_blend)
+            out += [L.spot_size * _RAD2DEG, float(L.spot_blend)]
         else:
-            out[p+"spot_cone_deg"] = ""; out[p+"spot_blend"] = ""
+            out += ["", ""]
 
         # area light properties
         if L.type == "AREA":
-            out[p+"area_shape"] = safe_str(getattr(L,"shape",""))
-            out[p+"area_size_x"] = safe_float(getattr(L,"size",0.0))
-            if out[p+"area_shape"] in {"RECTANGLE","ELLIPSE"}:
-                out[p+"area_size_y"] = safe_float(getattr(L,"size_y",0.0))
+            area_shape = safe_str(getattr(L,"shape",""))
+            area_size_x = safe_float(getattr(L,"size",0.0))
+            if area_shape in {"RECTANGLE","ELLIPSE"}:
+                area_size_y = safe_float(getattr(L,"size_y",0.0))
             else:
-                out[p+"area_size_y"] = out[p+"area_size_x"]
+                area_size_y = area_size_x
+            out += [area_shape, area_size_x, area_size_y]
         else:
-            out[p+"area_shape"] = ""; out[p+"area_size_x"] = ""; out[p+"area_size_y"] = ""
+            out += ["", "", ""]
 
-    return out
+        row[start:start+LIGHT_COLS] = out
 
 # MAIN EXECUTION LOGIC
 # grab current scene & frame range
 scene = bpy.context.scene
 fs, fe = scene.frame_start, scene.frame_end
 
-# headers for the csv file
-header = ["image_relpath","image_exists","shape_name","material_folder","light_folder","batch_folder",
-    "frame","config_id","camera_png",
-    "render_engine","view_transform","look",
-    "camera_name",
-    "cam_pos_x","cam_pos_y","cam_pos_z",
-    "cam_forward_x","cam_forward_y","cam_forward_z",
-    "cam_up_x","cam_up_y","cam_up_z",
-    "cam_right_x","cam_right_y","cam_right_z",
-    "focal_length_mm",
-    "num_active_lights"]
-# columns per light
-for i in range(MAX_ACTIVE_LIGHTS):
-    p = f"light{i}_"
-    header += [p+"name",p+"type",p+"energy",
-                p+"color_r",p+"color_g",p+"color_b",
-                p+"pos_x",p+"pos_y",p+"pos_z",
-                p+"dir_x",p+"dir_y",p+"dir_z",
-                p+"dir_cam_x",p+"dir_cam_y",p+"dir_cam_z",
-                p+"spot_cone_deg",p+"spot_blend",
-                p+"area_shape",p+"area_size_x",p+"area_size_y"]
-
 # different lighting setups
 setups = ["Point Light","Spot Light","Area Light","Tri Light","HDRI (Sunlight)","HDRI (Overcast)"]
 
-with open(OUT_CSV, "w", newline="", encoding="utf-8") as f:
-    w = csv.DictWriter(f, fieldnames=header)
-    w.writeheader()
+# optional subset of setups & output path .. lets parallel_export.py fan out one process per setup
+args = parse_args(sys.argv, setups)
+if args.setup: setups = [s for s in setups if s in args.setup]
+OUT_CSV = bpy.path.abspath(args.out)
+
+with BackgroundWriter(OUT_CSV) as f:
+    w = csv.writer(f)
+    w.writerow(header)
+    eol = w.dialect.lineterminator
+
+    # render settings are constant for the whole export
+    render_engine, view_transform, look, batch_folder = get_engine_and_batch(scene)
+
+    # per-shape image folders for every setup
+    prefix_by_setup = {setup: [os.path.join(shape, MATERIAL_FOLDER, setup, batch_folder) for shape in SHAPES]
+                       for setup in setups}
+    # one walk of the dataset instead of a stat() per row
+    check_exists = bool(DATASET_ROOT.strip())
+    existing = index_dataset(DATASET_ROOT) if check_exists else frozenset()
+
+    # single row template reused for every written row
+    row = [""] * len(header)
+    row[IDX_MATERIAL] = MATERIAL_FOLDER
+    row[IDX_BATCH] = batch_folder
+    row[IDX_ENGINE:IDX_ENGINE+3] = (render_engine, view_transform, look)
+
+    # evaluate each frame once for all setups .. light data (color, cone, size)
+    # is read live, so fall back to frame_set per setup if any of it is animated
+    frames = range(fs, fe+1)
+    light_data_animated = any(o.data.animation_data for o in ALL_LIGHT_OBJS)
+    samples = None if light_data_animated else sample_frames(scene, frames)
 
     # iterate through each lighting setup
     for setup in setups:
         set_light_setup(setup)
+        prefixes = prefix_by_setup[setup]
+        row[IDX_LIGHT_FOLDER] = setup
 
         # iterate through each frame in the scene
-        for frame in range(fs, fe+1):
-            scene.frame_set(frame)
+        for frame in frames:
+            if samples is None:
+                scene.frame_set(frame)
+                cam_static, cam_mw, light_mws, light_energies = sample_frame(scene)
+            else:
+                cam_static, cam_mw, light_mws, light_energies = samples[frame]
 
             # derive camera index & configuration id from frame index
             idx = frame - fs
             camera_png = (idx % CAMERAS_PER_CONFIG) + 1
             config_id  = idx // CAMERAS_PER_CONFIG
 
-            # base row data for all shapes in this frame/setup
-            base = {"material_folder": MATERIAL_FOLDER,
-                    "light_folder": setup,
-                    "frame": frame, "config_id": config_id, "camera_png": camera_png}
-            base.update(get_engine_and_batch(scene))
-            base.update(get_camera(scene))
-            base.update(get_active_lights(scene))
-
-            # emit a row per shape
-            for shape in SHAPES:
-                rel = os.path.join(shape, MATERIAL_FOLDER, setup, base["batch_folder"], f"{camera_png}.png")
-                exists = ""
-                if DATASET_ROOT.strip():
-                    exists = os.path.exists(os.path.join(DATASET_ROOT, rel))
-                row = dict(base)
-                row["shape_name"] = shape
-                row["image_relpath"] = rel
-                row["image_exists"] = exists
-                w.writerow(row)
+            # row data shared by all shapes in this frame/setup
+            row[IDX_FRAME] = frame; row[IDX_CONFIG] = config_id; row[IDX_CAMERA_PNG] = camera_png
+            row[IDX_CAMERA_NAME], row[IDX_FOCAL] = cam_static
+            cam_rot = get_camera_dynamic(cam_mw, row)
+            get_active_lights(row, cam_rot, light_mws, light_energies)
+
+            # format the shared columns once, then emit a row per shape
+            tail = "," + format_csv_fields(row[SHAPE_COLS:]) + eol
+            png_name = f"{camera_png}.png"
+            for shape, prefix in zip(SHAPES, prefixes):
+                rel = prefix + os.sep + png_name
+                row[IDX_RELPATH] = rel
+                row[IDX_EXISTS] = image_exists(DATASET_ROOT, rel, existing) if check_exists else ""
+                row[IDX_SHAPE] = shape
+                f.write(format_csv_fields(row[:SHAPE_COLS]) + tail)
 
 print("Wrote:", OUT_CSV)
\ No newline at end of file
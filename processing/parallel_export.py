@@ -0,0 +1,59 @@
+import argparse, os, shutil, subprocess, sys, tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# SETUP
+# exporter script run inside each blender process
+EXPORTER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_exporter.py")
+# lighting setups, one background blender per setup (keep in sync with data_exporter.py)
+SETUPS = ["Point Light","Spot Light","Area Light","Tri Light","HDRI (Sunlight)","HDRI (Overcast)"]
+
+# HELPER FUNCTIONS
+def export_setup(blender, blend_file, setup, out_csv):
+    """Run the exporter for a single lighting setup in a background blender.
+
+    Args:
+        blender: Blender executable.
+        blend_file: Scene to export from.
+        setup: Lighting setup name passed through to `data_exporter.py --setup`.
+        out_csv: Partial csv written by this process.
+    """
+    # blender exits 0 when a -P script raises unless told otherwise
+    cmd = [blender, "-b", blend_file, "--python-exit-code", "1", "-P", EXPORTER, "--", "--setup", setup, "--out", out_csv]
+    return subprocess.run(cmd).returncode
+
+def merge_csvs(parts, out_csv):
+    """Concatenate partial csvs into `out_csv`, keeping only the first header."""
+    with open(out_csv, "w", newline="", encoding="utf-8") as out:
+        for i, part in enumerate(parts):
+            with open(part, newline="", encoding="utf-8") as f:
+                header = f.readline()
+                if i == 0: out.write(header)
+                shutil.copyfileobj(f, out)
+
+# MAIN EXECUTION LOGIC
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run data_exporter.py with one blender process per lighting setup.")
+    parser.add_argument("blend_file", help="scene to export from")
+    parser.add_argument("--blender", default="blender", help="blender executable (default: %(default)s)")
+    parser.add_argument("--out", default=None, help="merged csv (default: master_with_paths.csv next to the blend file)")
+    parser.add_argument("--jobs", type=int, default=len(SETUPS), help="max concurrent blender processes")
+    args = parser.parse_args(argv)
+
+    blend_file = os.path.abspath(args.blend_file)
+    out_csv = os.path.abspath(args.out or os.path.join(os.path.dirname(blend_file), "master_with_paths.csv"))
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(out_csv)) as tmp:
+        parts = [os.path.join(tmp, f"part_{i}.csv") for i in range(len(SETUPS))]
+        with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+            codes = list(pool.map(lambda sp: export_setup(args.blender, blend_file, *sp), zip(SETUPS, parts)))
+        # a missing part means the exporter died before opening its output
+        failed = [s for s, code, part in zip(SETUPS, codes, parts) if code != 0 or not os.path.isfile(part)]
+        if failed:
+            sys.exit(f"export failed for: {', '.join(failed)}")
+        # parts are merged in setup order, matching a single-process export
+        merge_csvs(parts, out_csv)
+
+    print("Wrote:", out_csv)
+
+if __name__ == "__main__":
+    main()